@@ -0,0 +1,88 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+# --- CONFIGURATION ---
+API_URL = "http://127.0.0.1:8000"
+CACHE_TTL = 300          # Seconds a response stays cached per (endpoint, query)
+TIMEOUT = 30
+KEYWORD_FIELDS = "title,author_editor,isbn,year,description"  # Only what the UI shows
+
+# Threads for running the keyword and semantic calls side by side (kept across reruns)
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api")
+
+
+# -----------------------------
+# One pooled HTTP session for the whole Streamlit server
+# -----------------------------
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    # Keep-alive connections are reused across button presses (and between the parallel calls)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class APIError(Exception):
+    pass
+
+
+def _server_ms(response):
+    # "app;dur=3.2" -> 3.2
+    for part in response.headers.get("Server-Timing", "").split(";"):
+        if part.strip().startswith("dur="):
+            return float(part.strip()[4:])
+    return None
+
+
+# -----------------------------
+# Cached calls (keyed by endpoint + query, shared by all browser sessions)
+# -----------------------------
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def call_api(method, path, params):
+    """
+    Returns {"data", "server_ms", "fetch_ms", "fetched_at"}.
+    `params` is a tuple of (key, value) pairs so it can be part of the cache key.
+    Failures raise, so an error is never cached for the whole TTL.
+    """
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, f"{API_URL}{path}", params=dict(params), timeout=TIMEOUT)
+    except requests.RequestException as e:
+        raise APIError(f"Connection failed: {e}") from e
+    if response.status_code != 200:
+        raise APIError(f"Error: {response.status_code} - {response.text}")
+    return {
+        "data": response.json(),
+        "server_ms": _server_ms(response),
+        "fetch_ms": (time.perf_counter() - start) * 1000,
+        "fetched_at": time.time(),
+    }
+
+
+def keyword_search(query):
+    return call_api("GET", "/search", (("q", query), ("fields", KEYWORD_FIELDS)))
+
+
+def semantic_search(query):
+    return call_api("POST", "/recommend", (("user_query", query),))
+
+
+def run_searches(query, modes):
+    """
+    Run the selected searches at the same time; returns {mode: (result or None, error or None)}.
+    Total wait is the slowest call, not the sum.
+    """
+    calls = {"keyword": keyword_search, "semantic": semantic_search}
+    futures = {mode: _pool.submit(calls[mode], query) for mode in modes}
+    outcomes = {}
+    for mode, future in futures.items():
+        try:
+            outcomes[mode] = (future.result(), None)
+        except Exception as e:
+            outcomes[mode] = (None, str(e))
+    return outcomes
@@ -1,8 +1,14 @@
+import time
 import streamlit as st
-import requests
+from api_client import run_searches
 
 # --- CONFIGURATION ---
-API_URL = "http://127.0.0.1:8000"
+PAGE_SIZE = 10  # Results rendered per "Show more"
+
+MODE_BOTH = "⚡ Both (Keyword + Semantic)"
+MODE_SEMANTIC = "AI Recommendation (Semantic)"
+MODE_KEYWORD = "🔍 Database Search (Keyword)"
+MODES = {MODE_BOTH: ["keyword", "semantic"], MODE_SEMANTIC: ["semantic"], MODE_KEYWORD: ["keyword"]}
 
 # --- PAGE SETUP ---
 st.set_page_config(page_title="Library AI", page_icon="📚", layout="wide")
@@ -12,61 +18,101 @@ st.markdown("### Powered by Hybrid Search (SQL + Vector AI)")
 
 # --- SIDEBAR ---
 st.sidebar.header("Search Options")
-search_mode = st.sidebar.radio("Select Mode:", ["AI Recommendation (Semantic)", "🔍 Database Search (Keyword)"])
+search_mode = st.sidebar.radio("Select Mode:", list(MODES))
+
+
+# --- HELPERS ---
+def field(book, name):
+    """Column names are 'Title' or 'title' depending on how the DB was loaded."""
+    for key, value in book.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def timing_caption(result, started):
+    source = "cached" if result["fetched_at"] < started else "fresh"
+    server = f"server {result['server_ms']:.1f} ms · " if result["server_ms"] is not None else ""
+    return f"{server}fetch {result['fetch_ms']:.0f} ms ({source})"
+
+
+def page_limit(key, total):
+    """How many of `total` results to render; grows by PAGE_SIZE with each 'Show more' click."""
+    shown = st.session_state.setdefault(key, PAGE_SIZE)
+    return min(shown, total)
+
+
+def show_more_button(key, shown, total):
+    if shown < total and st.button(f"Show more ({total - shown} left)", key=f"more-{key}"):
+        st.session_state[key] = shown + PAGE_SIZE
+        st.rerun()
+
+
+def render_semantic(results):
+    shown = page_limit("semantic-shown", len(results))
+    for book in results[:shown]:
+        st.markdown("---")
+        col1, col2 = st.columns([1, 4])
+        col1.metric(label="Match Score", value=f"{float(book['score'])*100:.1f}%")
+        col2.markdown(f"### 📖 {book['title']}\n**Author:** {book['author']}")
+        col2.info(book['description'])
+    show_more_button("semantic-shown", shown, len(results))
+
+
+def render_keyword(results):
+    shown = page_limit("keyword-shown", len(results))
+    for book in results[:shown]:
+        with st.expander(f"📘 {field(book, 'title')} - {field(book, 'author_editor')}"):
+            st.write(f"**ISBN:** {field(book, 'isbn')}")
+            st.write(f"**Year:** {field(book, 'year')}")
+            st.write(f"**Description:** {field(book, 'description')}")
+    show_more_button("keyword-shown", shown, len(results))
+
 
 # --- MAIN LOGIC ---
-if search_mode == "AI Recommendation (Semantic)":
-    st.subheader("Find books by Concept, Vibe, or Plot")
-    query = st.text_input("Describe what you want to read:", placeholder="e.g., 'A sad story about space travel' or 'Introduction to linear algebra'")
-    
-    if st.button("Ask AI"):
-        if query:
-            with st.spinner("AI is thinking..."):
-                try:
-                    # Call your /recommend endpoint
-                    response = requests.post(f"{API_URL}/recommend", params={"user_query": query})
-                    if response.status_code == 200:
-                        data = response.json()
-                        results = data.get("recommendations", [])
-                        
-                        if not results:
-                            st.warning("No matches found.")
-                        
-                        # Display Results in a Grid
-                        for book in results:
-                            with st.container():
-                                st.markdown("---")
-                                col1, col2 = st.columns([1, 4])
-                                with col1:
-                                    st.metric(label="Match Score", value=f"{float(book['score'])*100:.1f}%")
-                                with col2:
-                                    st.markdown(f"### 📖 {book['title']}")
-                                    st.markdown(f"**Author:** {book['author']}")
-                                    st.info(book['description'])
-                    else:
-                        st.error(f"Error: {response.status_code} - {response.text}")
-                except Exception as e:
-                    st.error(f"Connection failed: {e}")
-
-elif search_mode == "Database Search (Keyword)":
-    st.subheader("Search by Exact Title or Author")
-    query = st.text_input("Enter keywords:", placeholder="e.g., 'Harry Potter' or 'Sagan'")
-    
-    if st.button("Search Database"):
-        if query:
-            with st.spinner("Searching SQL Database..."):
-                try:
-                    response = requests.get(f"{API_URL}/search", params={"q": query})
-                    if response.status_code == 200:
-                        data = response.json()
-                        results = data.get("results", [])
-                        
-                        st.success(f"Found {data['matches']} matches.")
-                        
-                        for book in results:
-                            with st.expander(f"📘 {book['Title']} - {book['Author_Editor']}"):
-                                st.write(f"**ISBN:** {book['ISBN']}")
-                                st.write(f"**Year:** {book['Year']}")
-                                st.write(f"**Description:** {book['description']}")
-                except Exception as e:
-                    st.error(f"Connection failed: {e}")
\ No newline at end of file
+st.subheader("Search by Title, Author, Concept or Plot")
+with st.form("search"):
+    query = st.text_input("What are you looking for?", placeholder="e.g., 'Harry Potter' or 'A sad story about space travel'")
+    submitted = st.form_submit_button("Search")
+
+if submitted:
+    # New query: start both result lists from the first page again
+    st.session_state["query"] = query
+    st.session_state["keyword-shown"] = PAGE_SIZE
+    st.session_state["semantic-shown"] = PAGE_SIZE
+
+query = st.session_state.get("query")
+if query:
+    modes = MODES[search_mode]
+    if "keyword" in modes and len(query) < 3:
+        st.warning("Keyword search needs at least 3 characters.")
+        modes = [m for m in modes if m != "keyword"]
+
+    if modes:
+        started = time.time()
+        with st.spinner("Searching..."):
+            # Repeated queries are served from the response cache (see api_client.py)
+            outcomes = run_searches(query, modes)
+        st.caption(f"⏱️ Results in {(time.time() - started) * 1000:.0f} ms")
+
+        columns = st.columns(len(modes))
+        for column, mode in zip(columns, modes):
+            result, error = outcomes[mode]
+            with column:
+                if mode == "keyword":
+                    st.markdown("#### 🔍 Keyword Matches")
+                else:
+                    st.markdown("#### 🧠 AI Recommendations")
+                if error:
+                    st.error(error)
+                    continue
+                st.caption(timing_caption(result, started))
+                data = result["data"]
+                if mode == "keyword":
+                    st.success(f"Found {data['matches']} matches.")
+                    render_keyword(data.get("results", []))
+                else:
+                    results = data.get("recommendations", [])
+                    if not results:
+                        st.warning("No matches found.")
+                    render_semantic(results)
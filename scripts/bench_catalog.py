@@ -0,0 +1,111 @@
+"""
+Bytes on the wire + serialization CPU for one 1,000-row /books page.
+
+  old        - SELECT * + dict(row) per row + FastAPI's default JSON encoding
+  sql-json   - JSON document built by SQLite (GET /books)
+  projected  - same, with fields=title,author_editor,year
+
+Runs against a temporary database with synthetic rows shaped like the real catalog.
+First checks that the new path returns the same bytes as the old one, including on a
+table with REAL values (those pages take the Python fallback).
+Usage: python bench_catalog.py
+"""
+import os
+import gzip
+import sqlite3
+import tempfile
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi import Response
+from fastapi.responses import JSONResponse
+import main
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROWS = 5000
+PAGE = 1000
+REPEAT = 50
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, acc_no TEXT, title TEXT, isbn TEXT,
+            author_editor TEXT, publisher TEXT, year INTEGER, pages INTEGER,
+            class_no TEXT, description TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO books (acc_no, title, isbn, author_editor, publisher, year, pages, class_no, description) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(str(10000 + i), f"Introduction to Topic {i}", f"978-81-{i:07d}", f"Author {i % 900}",
+          "New Delhi: Pearson", 1980 + i % 45, 200 + i % 600, f"{i % 1000}.{i % 97}",
+          "A thorough treatment of the subject, with worked examples and exercises. " * 9)
+         for i in range(ROWS)])
+    conn.commit()
+    conn.close()
+
+
+def render(result):
+    """Bytes FastAPI would send for an endpoint's return value."""
+    if isinstance(result, Response):
+        return result.body
+    return JSONResponse(jsonable_encoder(result)).body
+
+
+def old_path(db, limit=PAGE):
+    rows = [dict(row) for row in db.execute("SELECT * FROM books LIMIT ? OFFSET ?", (limit, 0)).fetchall()]
+    return render({"count": len(rows), "data": rows})
+
+
+def check_identical(tmp):
+    """Old and new /books bytes must match, with and without REAL values in the page."""
+    path = os.path.join(tmp, "check.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, year INTEGER, price REAL)")
+    conn.executemany("INSERT INTO books (title, year, price) VALUES (?, ?, ?)", [
+        ("Plain", 2001, None), ("Ünïcode \"quoted\"", 1999, None),         # page 1: no REALs -> SQLite JSON
+        ("Sum", 2002, 0.1 + 0.2), ("Third", 2003, 1 / 3), ("Big", 2004, 1e20), ("Half", 2005, 2.5),
+    ])
+    conn.commit()
+    conn.row_factory = sqlite3.Row
+    for limit in (2, 6):
+        old = old_path(conn, limit)
+        new = render(main.get_books(limit=limit, offset=0, fields=None, db=conn))
+        assert old == new, f"limit={limit}:\n old {old!r}\n new {new!r}"
+    conn.close()
+    print("✅ /books output identical to the old path (integer-only and REAL pages)")
+
+
+def timed(fn):
+    fn()
+    start = time.process_time()
+    for _ in range(REPEAT):
+        body = fn()
+    return body, (time.process_time() - start) / REPEAT * 1000
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        check_identical(tmp)
+        path = os.path.join(tmp, "bench.sqlite3")
+        make_db(path)
+        db = sqlite3.connect(path)
+        db.row_factory = sqlite3.Row
+
+        cases = {
+            "old": lambda: old_path(db),
+            "sql-json": lambda: main.get_books(limit=PAGE, offset=0, fields=None, db=db).body,
+            "projected": lambda: main.get_books(limit=PAGE, offset=0, fields="title,author_editor,year", db=db).body,
+        }
+        print(f"{'path':>10} | {'CPU ms':>7} | {'raw KB':>7} | {'gzip KB':>7} | {'brotli KB':>9}")
+        for name, fn in cases.items():
+            body, cpu_ms = timed(fn)
+            gz = len(gzip.compress(body, compresslevel=9)) / 1024
+            br = f"{len(brotli.compress(body, quality=4)) / 1024:>9.1f}" if brotli else f"{'n/a':>9}"
+            print(f"{name:>10} | {cpu_ms:>7.2f} | {len(body) / 1024:>7.1f} | {gz:>7.1f} | {br}")
+        db.close()
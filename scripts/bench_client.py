@@ -0,0 +1,45 @@
+"""
+Perceived latency of one search in the Streamlit client (keyword + semantic), against a running API.
+
+  old       - new connection per call, keyword then semantic one after the other
+  fresh     - pooled session, both calls in parallel, cache cleared first
+  repeated  - same query again within the cache TTL
+
+Usage: start the API (python main.py), then: python bench_client.py
+"""
+import time
+import statistics
+import requests
+import api_client
+
+QUERIES = ["history of india", "linear algebra", "organic chemistry", "space travel", "economics"]
+ROUNDS = 5
+
+
+def old_search(query):
+    requests.get(f"{api_client.API_URL}/search", params={"q": query}, timeout=api_client.TIMEOUT)
+    requests.post(f"{api_client.API_URL}/recommend", params={"user_query": query}, timeout=api_client.TIMEOUT)
+
+
+def new_search(query):
+    api_client.run_searches(query, ["keyword", "semantic"])
+
+
+def median_ms(fn, before=None):
+    times = []
+    for _ in range(ROUNDS):
+        for q in QUERIES:
+            if before:
+                before()
+            t0 = time.perf_counter()
+            fn(q)
+            times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    new_search(QUERIES[0])  # Warm up the API (model, page cache) and the connection pool
+    print(f"{'client':>9} | {'median ms':>9}")
+    print(f"{'old':>9} | {median_ms(old_search):>9.1f}")
+    print(f"{'fresh':>9} | {median_ms(new_search, before=api_client.call_api.clear):>9.1f}")
+    print(f"{'repeated':>9} | {median_ms(new_search):>9.1f}")
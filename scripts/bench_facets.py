@@ -0,0 +1,97 @@
+"""
+/facets latency at catalog size and at 1M rows (synthetic rows, no HTTP, no model).
+
+  group-by - what a dashboard costs today-ish: one GROUP BY scan per facet per request
+  index    - FacetIndex: facet_counts table when unfiltered, bitmap + bincount otherwise
+
+Cases: all books / keyword q (LIKE on title+author) / 200-row semantic result set /
+keyword AND semantic.
+Usage: python bench_facets.py [rows ...]     (default: 30400 1000000)
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import numpy as np
+import facets
+
+REPEAT = 20
+WORDS = ("history", "introduction", "modern", "theory", "economics", "physics", "chemistry",
+         "principles", "advanced", "world", "guide", "science", "language", "systems", "data")
+PLACES = ("New Delhi: Pearson", "Mumbai: Himalaya", "London: Routledge", "Ahmedabad: Navajivan",
+          "New York: Wiley", "Oxford: OUP", "Chennai: Orient", "Delhi: S. Chand")
+
+
+def make_db(path, rows):
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, author_editor TEXT, "
+                 "place_publisher TEXT, year INTEGER, class_no TEXT)")
+    conn.executemany(
+        "INSERT INTO books (title, author_editor, place_publisher, year, class_no) VALUES (?, ?, ?, ?, ?)",
+        ((" ".join(rng.choice(WORDS) for _ in range(4)), f"Author {rng.randrange(rows // 5 + 1)}",
+          rng.choice(PLACES), rng.randint(1950, 2024), f"{rng.randrange(1000):03d}.{rng.randrange(100)}")
+         for _ in range(rows)))
+    facets.materialize(conn)
+    conn.commit()
+    return conn
+
+
+def ms(fn):
+    fn()
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return np.median(times) * 1000
+
+
+def run(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = make_db(os.path.join(tmp, "bench.sqlite3"), rows)
+        t0 = time.perf_counter()
+        index = facets.FacetIndex(conn)
+        build_s = time.perf_counter() - t0
+
+        rng = np.random.default_rng(1)
+        semantic_ids = rng.choice(index.row_ids, 200, replace=False)
+        term = "%modern theory%"
+        exprs = {name: facets.FACETS[name][1] for name in index.names}
+
+        def group_by(where=""):
+            for expr in exprs.values():
+                conn.execute(f"SELECT {expr} AS b, count(*) FROM books {where} GROUP BY b ORDER BY 2 DESC LIMIT 20",
+                             (term, term) if where else ()).fetchall()
+
+        def keyword_mask():
+            ids = [r[0] for r in conn.execute(
+                "SELECT rowid FROM books WHERE title LIKE ? OR author_editor LIKE ?", (term, term))]
+            return index.mask_for_ids(ids)
+
+        def indexed(mask_fn):
+            mask = mask_fn()
+            for name in index.names:
+                index.counts(name, mask)
+
+        where = "WHERE title LIKE ? OR author_editor LIKE ?"
+        cases = [
+            ("all books", lambda: group_by(), lambda: indexed(lambda: None)),
+            ("keyword", lambda: group_by(where), lambda: indexed(keyword_mask)),
+            ("semantic 200", None, lambda: indexed(lambda: index.mask_for_ids(semantic_ids))),
+            ("kw AND sem", None, lambda: indexed(lambda: keyword_mask() & index.mask_for_ids(semantic_ids))),
+        ]
+        print(f"\n{rows:,} rows (index build {build_s:.2f} s, "
+              f"{sum(c.nbytes for c in index.codes.values()) / 2**20:.1f} MB of codes)")
+        print(f"{'case':>14} | {'group-by ms':>11} | {'index ms':>8}")
+        for name, naive, fast in cases:
+            naive_ms = f"{ms(naive):>11.2f}" if naive else f"{'-':>11}"
+            print(f"{name:>14} | {naive_ms} | {ms(fast):>8.2f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [30400, 1_000_000]:
+        run(n)
@@ -0,0 +1,92 @@
+"""
+Memory used by N worker processes holding the book vectors:
+  pickle - every worker unpickles its own DataFrame + matrix (old behaviour)
+  store  - every worker memory-maps the published vector_store/ version
+
+Uses a synthetic 30,400 x 384 catalog (same shape as books_vectors.pkl).
+The model itself is not loaded here; it is still one copy per worker in both modes.
+
+Usage: python bench_shared_vectors.py [max_workers]   (needs psutil)
+"""
+import os
+import sys
+import pickle
+import tempfile
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+import psutil
+import vector_store
+
+ROWS, DIM = 30400, 384
+
+
+def make_pickle(path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Title": [f"Book title number {i}" for i in range(ROWS)],
+        "Author_Editor": [f"Author {i % 5000}" for i in range(ROWS)],
+        "description": ["Lorem ipsum dolor sit amet " * 20 + str(i) for i in range(ROWS)],
+    })
+    embeddings = rng.standard_normal((ROWS, DIM), dtype=np.float32)
+    with open(path, "wb") as f:
+        pickle.dump({"dataframe": df, "embeddings": embeddings}, f)
+
+
+def worker(mode, pkl_path, root, ready, done):
+    query = np.ones((1, DIM), dtype=np.float32)
+    if mode == "pickle":
+        with open(pkl_path, "rb") as f:
+            data = pickle.load(f)
+        scores = np.dot(data["embeddings"], query.T)
+        titles = data["dataframe"]["Title"]
+    else:
+        store = vector_store.open_current(root)
+        scores = np.dot(store.embeddings, query.T)   # touches every page of the matrix
+        titles = store.columns["title"]
+    _ = titles[int(np.argmax(scores))]
+    ready.set()
+    done.wait()
+
+
+def measure(mode, n, pkl_path, root):
+    ctx = mp.get_context("spawn")
+    done = ctx.Event()
+    procs, events = [], []
+    for _ in range(n):
+        ready = ctx.Event()
+        p = ctx.Process(target=worker, args=(mode, pkl_path, root, ready, done))
+        p.start()
+        procs.append(p)
+        events.append(ready)
+    for e in events:
+        e.wait()
+
+    rss = pss = uss = 0
+    for p in procs:
+        info = psutil.Process(p.pid).memory_full_info()
+        rss += info.rss
+        uss += info.uss
+        pss += getattr(info, "pss", info.uss)   # PSS only exists on Linux
+    done.set()
+    for p in procs:
+        p.join()
+    return rss, pss, uss
+
+
+if __name__ == "__main__":
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    mb = 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, "books_vectors.pkl")
+        root = os.path.join(tmp, "vector_store")
+        make_pickle(pkl_path)
+        vector_store.publish_from_pickle(pkl_path, root)
+
+        print(f"{'workers':>7} | {'mode':>6} | {'RSS MB':>8} | {'PSS MB':>8} | {'USS MB':>8}")
+        n = 1
+        while n <= max_workers:
+            for mode in ("pickle", "store"):
+                rss, pss, uss = measure(mode, n, pkl_path, root)
+                print(f"{n:>7} | {mode:>6} | {rss / mb:>8.1f} | {pss / mb:>8.1f} | {uss / mb:>8.1f}")
+            n *= 2
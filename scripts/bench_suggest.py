@@ -0,0 +1,75 @@
+"""
+Memory footprint and lookup latency of the /suggest prefix index.
+
+  30k - catalog-sized: 30,400 rows (main.DB_PATH if it has a books table, else synthetic)
+  5M  - synthetic: ~5,000,000 distinct titles + authors
+
+Synthetic titles repeat now and then (copies of a book), so the count ranking is exercised.
+
+Queries are 1-8 character prefixes of existing entries, as typed in a search box.
+Usage: python bench_suggest.py [rows_for_big_run] [db_path]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import numpy as np
+from suggest_index import SuggestIndex
+import main
+
+WORDS = ("history", "introduction", "modern", "theory", "indian", "economics", "physics", "chemistry",
+         "principles", "advanced", "world", "guide", "art", "science", "language", "systems", "data",
+         "management", "law", "society", "culture", "english", "hindi", "mathematics", "computer",
+         "analysis", "design", "practice", "development", "studies", "gujarat", "philosophy")
+NAMES = ("sharma", "patel", "gupta", "singh", "shah", "mehta", "kumar", "joshi", "desai", "rao",
+         "smith", "jones", "brown", "miller", "wilson", "taylor", "clark", "lewis", "walker", "hall")
+
+
+def synthetic(n, seed=0):
+    rng = random.Random(seed)
+    titles = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) + f" {i}" for i in range(n)]
+    # ~1 in 5 rows is another copy of an earlier title
+    titles = [t if rng.random() < 0.8 else titles[rng.randrange(i + 1)] for i, t in enumerate(titles)]
+    authors = [f"{rng.choice(NAMES)} {rng.choice(NAMES)[0]}. {i % (n // 4 + 1)}" for i in range(n)]
+    return titles, authors
+
+
+def catalog(path):
+    """(label, titles, authors) from the books table at `path`, or a synthetic stand-in."""
+    if os.path.exists(path):
+        try:
+            rows = sqlite3.connect(path).execute("SELECT title, author_editor FROM books").fetchall()
+            if rows:
+                return "db", [r[0] for r in rows], [r[1] for r in rows]
+        except sqlite3.OperationalError:
+            pass
+    print(f"ℹ️ No books table at {path}, the 30k run uses synthetic rows.")
+    return "syn", *synthetic(30400)
+
+
+def run(name, titles, authors, queries=20000):
+    start = time.perf_counter()
+    index = SuggestIndex(titles, authors)
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(1)
+    sample = [index.text[rng.randrange(len(index))] for _ in range(queries)]
+    prefixes = [t[:rng.randint(1, 8)] for t in sample]
+    times = np.empty(len(prefixes))
+    for i, p in enumerate(prefixes):
+        t0 = time.perf_counter()
+        index.lookup(p, 10)
+        times[i] = time.perf_counter() - t0
+    us = times * 1e6
+    print(f"{name:>9} | {len(index):>10,} | {index.nbytes() / 2**20:>9.1f} | {build_s:>7.1f} | "
+          f"{np.percentile(us, 50):>7.1f} | {np.percentile(us, 99):>7.1f} | {us.max():>8.1f}")
+
+
+if __name__ == "__main__":
+    big = int(sys.argv[1]) if len(sys.argv) > 1 else 2_500_000
+    source, titles, authors = catalog(sys.argv[2] if len(sys.argv) > 2 else main.DB_PATH)
+    print(f"{'set':>9} | {'entries':>10} | {'index MB':>9} | {'build s':>7} | {'p50 us':>7} | {'p99 us':>7} | {'max us':>8}")
+    run(f"30k {source}", titles, authors)
+    # Each row yields a title and an author entry, so 2.5M rows ~ 5M entries
+    run("5M", *synthetic(big))
@@ -0,0 +1,170 @@
+import io
+import csv
+import json
+import math
+import sqlite3
+
+try:
+    # Optional: only needed for format=parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# --- CONFIGURATION ---
+BATCH_SIZE = 2000  # Rows per keyset query / per streamed chunk / per parquet row group
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+# -----------------------------
+# Reading: keyset pagination on rowid
+# -----------------------------
+class CatalogChanged(Exception):
+    pass
+
+
+def catalog_version(conn):
+    """
+    Changes whenever the books table is rebuilt: /sync swaps tables with renames,
+    which bumps SQLite's schema cookie. Ids are only comparable within one version.
+    """
+    return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+
+def iter_batches(db_path, select_sql, where_sql, params, after_id=0, version=None):
+    """
+    Yield lists of rows in rowid order (select_sql must start with rowid), BATCH_SIZE at a time.
+    Each batch is its own short query (`rowid > last seen`), so memory stays flat,
+    no read lock is held between chunks and an interrupted export can be resumed
+    with after_id = the last id received.
+    With `version`, CatalogChanged is raised (the stream is cut off) as soon as the
+    table was rebuilt, instead of continuing with ids from the new catalog.
+    """
+    # The response is iterated from a threadpool, so chunks may come from different threads
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        last_id = after_id
+        while True:
+            rows = conn.execute(
+                f"SELECT {select_sql} FROM books WHERE rowid > ? {where_sql} ORDER BY rowid LIMIT ?",
+                (last_id, *params, BATCH_SIZE),
+            ).fetchall()
+            # Checked after the read: the version only moves forward, so unchanged now means unchanged then
+            if version is not None and catalog_version(conn) != version:
+                raise CatalogChanged(f"catalog changed during export (version {version})")
+            if not rows:
+                break
+            yield rows
+            last_id = rows[-1][0]
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# Writing: one generator per format, each yields bytes
+# -----------------------------
+def _row_json(header, values):
+    # NaN / inf have no JSON form, so they are written as null
+    clean = [None if isinstance(v, float) and not math.isfinite(v) else v for v in values]
+    return json.dumps(dict(zip(header, clean)), ensure_ascii=False, separators=(",", ":"))
+
+
+def ndjson_stream(batches, header):
+    """
+    Batches of (rowid, json_text, raw values...) rows -> one JSON object per line.
+    json_text is NULL for rows holding a REAL; those are encoded here from the raw values.
+    """
+    for rows in batches:
+        lines = [row[1] if row[1] is not None else _row_json(header, (row[0],) + tuple(row[2:]))
+                 for row in rows]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def csv_stream(batches, header, include_header=True):
+    """Batches of (rowid, col, ...) rows -> CSV, rowid written as the id column."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        writer.writerow(header)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that lets us hand each parquet row group to the client as it is written."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_type(declared):
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(t in declared for t in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def _coerce(value, arrow_type):
+    # SQLite is loosely typed (e.g. year stored as 2001.0 or '2001'), parquet is not
+    if value is None:
+        return None
+    try:
+        if arrow_type == pa.int64():
+            return int(float(value))
+        if arrow_type == pa.float64():
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def parquet_stream(batches, header, declared_types):
+    """One row group per batch; the footer goes out last, when the writer closes."""
+    schema = pa.schema([(name, _arrow_type(t)) for name, t in zip(header, declared_types)])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in batches:
+            arrays = [
+                pa.array([_coerce(row[i], field.type) for row in rows], type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
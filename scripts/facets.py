@@ -0,0 +1,108 @@
+import numpy as np
+
+# --- CONFIGURATION ---
+# facet name -> (column it needs, SQL expression for the bucket)
+FACETS = {
+    "year": ("year", "CASE WHEN typeof(year) IN ('integer', 'real') THEN CAST(year AS INTEGER) END"),
+    "decade": ("year", "CASE WHEN typeof(year) IN ('integer', 'real') THEN CAST(year AS INTEGER) / 10 * 10 END"),
+    "class_no": ("class_no", "NULLIF(TRIM(class_no), '')"),
+    "place_publisher": ("place_publisher", "NULLIF(TRIM(place_publisher), '')"),
+}
+
+
+def available_facets(conn, source="books"):
+    columns = {row[1].lower() for row in conn.execute(f"PRAGMA table_info({source})")}
+    return [name for name, (column, _) in FACETS.items() if column in columns]
+
+
+# -----------------------------
+# Materialized counts (written by /sync)
+# -----------------------------
+def materialize(conn, source="books", target="facet_counts"):
+    """(Re)create `target` with one row per (facet, value) and its book count."""
+    conn.execute(f"DROP TABLE IF EXISTS {target}")
+    conn.execute(f"""
+        CREATE TABLE {target} (
+            facet TEXT NOT NULL,
+            value,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (facet, value)
+        )
+    """)
+    for name in available_facets(conn, source):
+        expr = FACETS[name][1]
+        conn.execute(f"""
+            INSERT INTO {target} (facet, value, count)
+            SELECT ?, bucket, count(*) FROM (SELECT {expr} AS bucket FROM {source})
+            WHERE bucket IS NOT NULL GROUP BY bucket
+        """, (name,))
+
+
+# -----------------------------
+# In-memory index for filtered counts
+# -----------------------------
+class FacetIndex:
+    """
+    Per facet: the distinct values (from facet_counts) and one int32 code per book,
+    in rowid order. A query's result set is a boolean mask over the same rows, so
+    keyword and semantic results intersect with `&`, and the counts for any result
+    set are one np.bincount instead of a GROUP BY scan.
+    """
+
+    def __init__(self, conn):
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        counts_table = "facet_counts"
+        if "facet_counts" not in tables:
+            # DB loaded before facets existed: compute once into a TEMP table, leave the file alone
+            counts_table = "temp.facet_counts"
+            materialize(conn, target=counts_table)
+
+        self.names = available_facets(conn)
+        self.values, self.totals, self.codes, self.value_order = {}, {}, {}, {}
+        lookup = {}
+        for name in self.names:
+            rows = conn.execute(
+                f"SELECT value, count FROM {counts_table} WHERE facet = ? ORDER BY count DESC", (name,)
+            ).fetchall()
+            self.values[name] = [r[0] for r in rows]
+            self.totals[name] = np.array([r[1] for r in rows], dtype=np.int64)
+            # Sorting by value: numbers first, then text
+            self.value_order[name] = np.array(sorted(
+                range(len(rows)), key=lambda i: (isinstance(rows[i][0], str), rows[i][0])), dtype=np.int64)
+            lookup[name] = {v: i for i, v in enumerate(self.values[name])}
+
+        exprs = ", ".join(FACETS[name][1] for name in self.names)
+        rows = conn.execute(f"SELECT rowid{', ' + exprs if exprs else ''} FROM books ORDER BY rowid").fetchall()
+        self.row_ids = np.array([r[0] for r in rows], dtype=np.int64)
+        for j, name in enumerate(self.names, start=1):
+            codes = lookup[name]
+            self.codes[name] = np.array([codes.get(r[j], -1) for r in rows], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def mask_for_ids(self, ids):
+        """Boolean mask (one bit per book) of the rows whose rowid is in `ids`."""
+        ids = np.asarray(ids, dtype=np.int64)
+        mask = np.zeros(len(self.row_ids), dtype=bool)
+        if len(ids) and len(self.row_ids):
+            pos = np.clip(np.searchsorted(self.row_ids, ids), 0, len(self.row_ids) - 1)
+            mask[pos[self.row_ids[pos] == ids]] = True
+        return mask
+
+    def counts(self, name, mask=None, limit=20, sort="count"):
+        if mask is None:
+            counts = self.totals[name]  # Straight from facet_counts
+        else:
+            codes = self.codes[name][mask]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.values[name]))
+
+        if sort == "value":
+            order = self.value_order[name]
+            order = order[counts[order] > 0][:limit]
+        else:
+            nonzero = np.flatnonzero(counts)
+            # Stable sort keeps facet_counts order (count desc) for ties
+            order = nonzero[np.argsort(-counts[nonzero], kind="stable")][:limit]
+        values = self.values[name]
+        return [{"value": values[i], "count": int(counts[i])} for i in order]
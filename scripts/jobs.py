@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import vector_store
+
+# --- CONFIGURATION ---
+JOBS_DB_PATH = "jobs.sqlite3"
+KEEP_FINISHED = 50  # How many finished jobs stay visible in GET /jobs
+
+# Runners alive in this process. A job's owner is (pid, runner id): after a crash the
+# restarted server can get the same pid (PID 1 in a container), but never the same runner id.
+_live_runners = set()
+
+COLUMNS = ("id", "kind", "status", "progress", "message", "result", "error",
+           "created_at", "started_at", "finished_at")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@contextmanager
+def _connect(path):
+    """Short-lived connection; commits on success, rolls back on error."""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _row_to_dict(row):
+    job = dict(zip(COLUMNS, row))
+    job["job_id"] = job.pop("id")
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    return job
+
+
+class Job:
+    """
+    Handle passed to the task function. The task calls job.report(progress, message)
+    as it goes; report() is also the cancellation checkpoint, so a cancelled job
+    stops at its next report (whichever worker the cancel request reached).
+    """
+
+    def __init__(self, runner, job_id, kind):
+        self.runner = runner
+        self.id = job_id
+        self.kind = kind
+
+    def report(self, progress, message=None):
+        progress = round(min(max(progress, 0.0), 1.0), 4)
+        with _connect(self.runner.path) as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (self.id,)).fetchone()
+            if row is not None and row[0]:
+                raise JobCancelled()
+            conn.execute("UPDATE jobs SET progress = ?, message = COALESCE(?, message) WHERE id = ?",
+                         (progress, message, self.id))
+
+    def note(self, message):
+        """Update the message only, without a cancellation checkpoint."""
+        self.runner._update(self.id, message=message)
+
+
+class JobRunner:
+    """
+    Job queue whose state lives in a small SQLite file, so with several uvicorn
+    workers any of them can report a job's status or cancel it. Each worker runs
+    the jobs it accepted on its own thread, one after another (a /reindex
+    submitted after a /sync sees the new table).
+    The file is kept apart from the catalog DB: a running /sync holds that DB's
+    write lock, so progress updates written there would wait for the sync itself.
+    """
+
+    def __init__(self, path=JOBS_DB_PATH, max_workers=1):
+        self.path = path
+        self.runner_id = uuid.uuid4().hex
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        with _connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner_pid INTEGER NOT NULL,
+                    runner_id TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            if "runner_id" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN runner_id TEXT")
+        _live_runners.add(self.runner_id)
+        self._reap()
+
+    def submit(self, kind, fn):
+        """Queue fn(job). If a job of the same kind is still waiting in any worker's queue, return that one instead."""
+        self._reap()
+        job_id = uuid.uuid4().hex[:12]
+        with _connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM jobs WHERE kind = ? AND status = 'queued' ORDER BY created_at LIMIT 1",
+                               (kind,)).fetchone()
+            if row is not None:
+                job_id = row[0]
+            else:
+                conn.execute("INSERT INTO jobs (id, kind, status, message, created_at, owner_pid, runner_id) "
+                             "VALUES (?, ?, 'queued', 'Waiting to start', ?, ?, ?)",
+                             (job_id, kind, time.time(), os.getpid(), self.runner_id))
+                self._forget_old(conn)
+        if row is None:
+            self.executor.submit(self._run, Job(self, job_id, kind), fn)
+        return self.get(job_id)
+
+    def _run(self, job, fn):
+        with _connect(self.path) as conn:
+            started = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, message = 'Started' "
+                "WHERE id = ? AND status = 'queued'", (time.time(), job.id)).rowcount
+        if not started:
+            # Cancelled while queued
+            return
+        try:
+            result = fn(job)
+            self._update(job.id, status="succeeded", progress=1.0, message="Done",
+                         result=json.dumps(result), finished_at=time.time())
+        except JobCancelled:
+            self._update(job.id, status="cancelled", message="Cancelled", finished_at=time.time())
+        except Exception as e:
+            self._update(job.id, status="failed", error=str(e), message="Failed", finished_at=time.time())
+
+    def _update(self, job_id, **values):
+        with _connect(self.path) as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in values)} WHERE id = ?",
+                         (*values.values(), job_id))
+
+    def get(self, job_id):
+        with _connect(self.path) as conn:
+            row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row is not None else None
+
+    def list(self):
+        with _connect(self.path) as conn:
+            rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs ORDER BY created_at DESC").fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def cancel(self, job_id):
+        """A queued job is cancelled right away; a running one stops at its next report()."""
+        with _connect(self.path) as conn:
+            conn.execute("UPDATE jobs SET status = 'cancelled', message = 'Cancelled', finished_at = ? "
+                         "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def shutdown(self):
+        with _connect(self.path) as conn:
+            active = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE runner_id = ? AND status IN ('queued', 'running')", (self.runner_id,))]
+        for job_id in active:
+            self.cancel(job_id)
+        self.executor.shutdown(wait=True)
+        _live_runners.discard(self.runner_id)
+
+    def _reap(self):
+        """Fail the active jobs of runners that stopped without finishing them."""
+        with _connect(self.path) as conn:
+            owners = conn.execute(
+                "SELECT DISTINCT owner_pid, runner_id FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+            for pid, runner_id in owners:
+                # Same pid: only this process's live runners count (the pid may be a reused one)
+                alive = runner_id in _live_runners if pid == os.getpid() else vector_store.pid_alive(pid)
+                if not alive:
+                    conn.execute("UPDATE jobs SET status = 'failed', error = 'Worker stopped', message = 'Failed', "
+                                 "finished_at = ? WHERE owner_pid = ? AND runner_id IS ? "
+                                 "AND status IN ('queued', 'running')", (time.time(), pid, runner_id))
+
+    def _forget_old(self, conn):
+        conn.execute("""
+            DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND id NOT IN (
+                SELECT id FROM jobs WHERE status NOT IN ('queued', 'running')
+                ORDER BY finished_at DESC LIMIT ?
+            )
+        """, (KEEP_FINISHED,))
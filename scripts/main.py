@@ -1,45 +1,87 @@
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, Response
+from fastapi.responses import StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 import sqlite3
 import pandas as pd
 import os
-import pickle
+import time
+import threading
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import vector_store
+import catalog_export
+import jobs
+import suggest_index
+import facets
+
+try:
+    # Optional: brotli when the client asks for it, gzip otherwise
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # --- CONFIGURATION ---
 DB_PATH = "data\db.sqlite3"
+JOBS_DB_PATH = "data\jobs.sqlite3"  # Job status shared by all workers (not in DB_PATH, see jobs.py)
 CSV_SOURCE = "data\processed\Final_Merged_Dataset.csv"
 VECTORS_PATH = "books_vectors.pkl"
 MODEL_NAME = 'all-MiniLM-L6-v2'
+WORKERS = int(os.environ.get("WORKERS", "1"))
+COMPRESS_MIN_BYTES = 1024  # Smaller responses aren't worth compressing
+SYNC_CHUNK_ROWS = 2000     # Rows per insert batch (one progress step each)
+REINDEX_BATCH = 256        # Texts per encode() call (one progress step each)
+
+# Columns of the CSV (lower-cased) that /sync copies into the books table
+SYNC_COLUMNS = {
+    "acc_date": "TEXT",
+    "acc_no": "TEXT",
+    "title": "TEXT",
+    "isbn": "TEXT",
+    "author_editor": "TEXT",
+    "edition_volume": "TEXT",
+    "place_publisher": "TEXT",
+    "year": "INTEGER",
+    "pages": "TEXT",
+    "class_no": "TEXT",
+    "description": "TEXT",
+}
+# Tables /sync rebuilds as <name>_new_<job id> and swaps in together
+SYNC_TABLES = ("books", "facet_counts")
+SYNC_LOCK_POLL = 1.0       # Seconds between cancellation checks while another sync holds the lock
+FACET_SEMANTIC_TOP_K = 200  # Rows a semantic query contributes to /facets by default
 
 # --- GLOBAL VARIABLES (The AI Brain) ---
-# These sit in RAM so they are fast to access
+# The model is per-process. The vectors + metadata are memory-mapped from
+# vector_store/, so every uvicorn worker shares one copy of them.
 ai_model = None
-book_vectors = None
-book_df = None
+live_store = vector_store.LiveStore()
+job_runner = None
 
 # --- LIFESPAN MANAGER (Starts when you run uvicorn) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global ai_model, book_vectors, book_df
+    global ai_model, job_runner
     
     print("⏳ Starting up... Loading AI Model & Vectors...")
+    job_runner = jobs.JobRunner(JOBS_DB_PATH)
     
     try:
         # 1. Load the Sentence Transformer
         ai_model = SentenceTransformer(MODEL_NAME)
         
-        # 2. Load the Pickle File (Vectors)
-        if os.path.exists(VECTORS_PATH):
-            with open(VECTORS_PATH, "rb") as f:
-                data = pickle.load(f)
-                book_df = data["dataframe"]
-                book_vectors = data["embeddings"]
-            print("✅ AI System Ready! /recommend endpoint is active.")
+        # 2. Attach to the shared vector store (first worker converts the pickle if needed)
+        vector_store.ensure_published(VECTORS_PATH)
+        store = live_store.get()
+        if store is not None:
+            print(f"✅ AI System Ready! Vectors {store.version} attached. /recommend endpoint is active.")
         else:
-            print("⚠️ Warning: books_vectors.pkl not found. Run generate_embeddings.py first.")
+            print("⚠️ Warning: no vectors found. Run generate_embeddings.py first.")
+
+        # 3. Build the /suggest and /facets indexes now rather than on the first request
+        suggest_cache.get()
+        facet_cache.get()
             
     except Exception as e:
         print(f"❌ Error loading AI: {e}")
@@ -48,8 +90,10 @@ async def lifespan(app: FastAPI):
     
     # Clean up when server stops
     print("🛑 Server shutting down...")
-    del ai_model
-    del book_vectors
+    job_runner.shutdown()
+    job_runner = None
+    ai_model = None
+    live_store.store = None
 
 app = FastAPI(
     title="Book Library AI API",
@@ -58,6 +102,19 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
+@app.middleware("http")
+async def add_server_timing(request, call_next):
+    """Report handler time as a Server-Timing header (shown by browsers' dev tools and by scripts/app.py)."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = f"app;dur={(time.perf_counter() - start) * 1000:.1f}"
+    return response
+
 # -----------------------------
 # Dependency: Database Session
 # -----------------------------
@@ -69,6 +126,106 @@ def get_db():
     finally:
         conn.close()
 
+# -----------------------------
+# Helpers: Field Projection + JSON built inside SQLite
+# -----------------------------
+def get_book_columns(db: sqlite3.Connection) -> List[str]:
+    return [row[1] for row in db.execute("PRAGMA table_info(books)")]
+
+def resolve_fields(fields: Optional[str], db: sqlite3.Connection) -> List[str]:
+    """Turn 'title,year' into real column names (case-insensitive). None means every column."""
+    columns = get_book_columns(db)
+    if not fields:
+        return columns
+    by_lower = {c.lower(): c for c in columns}
+    selected = []
+    for name in fields.split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in by_lower:
+            raise HTTPException(status_code=400, detail=f"Unknown field '{name}'. Available: {', '.join(columns)}")
+        if by_lower[name] not in selected:
+            selected.append(by_lower[name])
+    if not selected:
+        raise HTTPException(status_code=400, detail="fields must name at least one column")
+    return selected
+
+def quote_column(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+def json_pairs_sql(columns: List[str]) -> str:
+    return ", ".join("'{}', {}".format(c.replace("'", "''"), quote_column(c)) for c in columns)
+
+def json_row_sql(columns: List[str]) -> str:
+    """SQL expression that renders one row as a JSON object with the given columns."""
+    return f"json_object({json_pairs_sql(columns)})"
+
+def real_flag_sql(columns: List[str]) -> str:
+    """SQL expression that is 1 when any of the columns holds a REAL in this row."""
+    return "(" + " OR ".join(f"typeof({quote_column(c)}) = 'real'" for c in columns) + ")"
+
+def json_response(db: sqlite3.Connection, sql: str, params: tuple, fallback):
+    """
+    Run a query that returns (JSON document, has REAL values) and send the document as-is.
+    No per-row dicts and no Python JSON encoding on the hot path.
+    SQLite writes REALs with only 15 significant digits (0.30000000000000004 -> 0.3,
+    1e20 -> 1.0e+20, inf -> Inf), so a result holding any REAL is built by `fallback`
+    and encoded by FastAPI exactly like before.
+    """
+    row = db.execute(sql, params).fetchone()
+    if row is None or row[0] is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    if row[1]:
+        return fallback()
+    return Response(content=row[0], media_type="application/json")
+
+FIELDS_QUERY = Query(None, description="Comma-separated columns to return, e.g. title,author_editor,year")
+
+# -----------------------------
+# Helper: In-Memory Structures Built From the Books Table
+# -----------------------------
+def db_version() -> Optional[int]:
+    if not os.path.exists(DB_PATH):
+        return None
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return catalog_export.catalog_version(conn)
+    finally:
+        conn.close()
+
+class CatalogCache:
+    """
+    Holds something built from the books table (e.g. the /suggest index) and
+    rebuilds it when the catalog version changes, so a /sync run by any worker
+    reaches every worker. The version is checked at most once per CHECK_INTERVAL.
+    (Not the file mtime: in WAL mode commits land in the -wal file.)
+    """
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, build):
+        self.build = build
+        self.value = None
+        self.db_version = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if now - self.last_check >= self.CHECK_INTERVAL:
+            self.last_check = now
+            version = db_version()
+            if version != self.db_version:
+                with self.lock:
+                    if version != self.db_version:
+                        self.value = self.build()
+                        self.db_version = version
+        return self.value
+
+    def refresh(self):
+        self.last_check = 0.0
+        return self.get()
+
 # -----------------------------
 # 1. Health Check
 # -----------------------------
@@ -81,27 +238,214 @@ def root():
 # 2. Get Books (SQL Pagination)
 # -----------------------------
 @app.get("/books")
-def get_books(limit: int = 20, offset: int = 0, db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM books LIMIT ? OFFSET ?", (limit, offset))
-    rows = [dict(row) for row in cursor.fetchall()]
-    return {"count": len(rows), "data": rows}
+def get_books(limit: int = Query(20, ge=1, le=1000), offset: int = Query(0, ge=0), fields: Optional[str] = FIELDS_QUERY,
+              db: sqlite3.Connection = Depends(get_db)):
+    columns = resolve_fields(fields, db)
+    select = ", ".join(quote_column(c) for c in columns)
+    page_sql = f"SELECT {select} FROM books LIMIT ? OFFSET ?"
+
+    def fallback():
+        rows = [dict(row) for row in db.execute(page_sql, (limit, offset)).fetchall()]
+        return {"count": len(rows), "data": rows}
+
+    return json_response(db, f"""
+        SELECT json_object('count', count(*), 'data', json_group_array({json_row_sql(columns)})),
+               max({real_flag_sql(columns)})
+        FROM ({page_sql})
+    """, (limit, offset), fallback)
+
+# -----------------------------
+# 2b. Bulk Export (Streaming)
+# -----------------------------
+@app.get("/books/export")
+def export_books(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    fields: Optional[str] = FIELDS_QUERY,
+    after_id: int = Query(0, ge=0, description="Resume: only rows with id > after_id"),
+    if_version: Optional[int] = Query(None, description="Resume: X-Catalog-Version of the first download"),
+    until_id: Optional[int] = Query(None, ge=1, description="Stop after this id (inclusive)"),
+    q: Optional[str] = Query(None, min_length=3, description="Title/Author contains"),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    class_no: Optional[str] = Query(None, description="Class number prefix, e.g. 005"),
+    header: bool = Query(True, description="CSV only: write the header row"),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    Stream the whole catalog (or a filtered / id-bounded slice of it) in id order.
+    Every row carries its `id`; after an interrupted download, call again with
+    after_id=<last id received> and if_version=<its X-Catalog-Version> to continue
+    where it stopped. A /sync in between renumbers the ids, so that returns 409.
+    """
+    if format == "parquet" and catalog_export.pq is None:
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow (pip install pyarrow)")
+
+    version = catalog_export.catalog_version(db)
+    if if_version is not None and if_version != version:
+        raise HTTPException(status_code=409, detail="Catalog changed since the first download (a /sync ran). "
+                                                    "Start over without after_id.")
+
+    declared = {row[1]: row[2] for row in db.execute("PRAGMA table_info(books)")}
+    # `id` always comes first and is the rowid, so it is left out of the selected columns
+    columns = [c for c in resolve_fields(fields, db) if c.lower() != "id"]
+
+    where, params = [], []
+    if until_id is not None:
+        where.append("rowid <= ?")
+        params.append(until_id)
+    if q:
+        where.append("(title LIKE ? OR author_editor LIKE ?)")
+        params += [f"%{q}%", f"%{q}%"]
+    if year_from is not None:
+        where.append("year >= ?")
+        params.append(year_from)
+    if year_to is not None:
+        where.append("year <= ?")
+        params.append(year_to)
+    if class_no:
+        where.append("class_no LIKE ?")
+        params.append(f"{class_no}%")
+    where_sql = "".join(f" AND {w}" for w in where)
+
+    if format == "ndjson":
+        pairs = ", ".join(["'id', rowid"] + ([json_pairs_sql(columns)] if columns else []))
+        if columns:
+            # Rows holding a REAL come back as raw values for Python to encode (see json_response)
+            flag = real_flag_sql(columns)
+            raw = "".join(f", CASE WHEN {flag} THEN {quote_column(c)} END" for c in columns)
+            select = f"rowid, CASE WHEN {flag} THEN NULL ELSE json_object({pairs}) END{raw}"
+        else:
+            select = f"rowid, json_object({pairs})"
+    else:
+        select = ", ".join(["rowid"] + [quote_column(c) for c in columns])
+    batches = catalog_export.iter_batches(DB_PATH, select, where_sql, tuple(params), after_id, version)
+
+    header_names = ["id"] + columns
+    if format == "ndjson":
+        body = catalog_export.ndjson_stream(batches, header_names)
+    elif format == "csv":
+        body = catalog_export.csv_stream(batches, header_names, include_header=header)
+    else:
+        types = ["INTEGER"] + [declared.get(c) for c in columns]
+        body = catalog_export.parquet_stream(batches, header_names, types)
+
+    media_type, extension = catalog_export.FORMATS[format]
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="books.{extension}"',
+                                      "X-Catalog-Version": str(version)})
 
 # -----------------------------
 # 3. Keyword Search (SQL LIKE)
 # -----------------------------
 @app.get("/search")
-def search_books(q: str = Query(..., min_length=3), db: sqlite3.Connection = Depends(get_db)):
+def search_books(q: str = Query(..., min_length=3), fields: Optional[str] = FIELDS_QUERY,
+                 db: sqlite3.Connection = Depends(get_db)):
     """Standard text search for Title or Author."""
-    cursor = db.cursor()
+    columns = resolve_fields(fields, db)
+    select = ", ".join(quote_column(c) for c in columns)
     search_term = f"%{q}%"
-    cursor.execute("""
-        SELECT * FROM books 
+    matches_sql = f"""
+        SELECT {select} FROM books 
         WHERE title LIKE ? OR author_editor LIKE ?
         LIMIT 20
-    """, (search_term, search_term))
-    rows = [dict(row) for row in cursor.fetchall()]
-    return {"query": q, "matches": len(rows), "results": rows}
+    """
+
+    def fallback():
+        rows = [dict(row) for row in db.execute(matches_sql, (search_term, search_term)).fetchall()]
+        return {"query": q, "matches": len(rows), "results": rows}
+
+    return json_response(db, f"""
+        SELECT json_object('query', ?, 'matches', count(*), 'results', json_group_array({json_row_sql(columns)})),
+               max({real_flag_sql(columns)})
+        FROM ({matches_sql})
+    """, (q, search_term, search_term), fallback)
+
+# -----------------------------
+# 3b. Typeahead (In-Memory Prefix Index)
+# -----------------------------
+def build_suggest_index() -> Optional[suggest_index.SuggestIndex]:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute("SELECT title, author_editor FROM books").fetchall()
+    except sqlite3.OperationalError:
+        return None  # No books table yet
+    finally:
+        conn.close()
+    return suggest_index.SuggestIndex([r[0] for r in rows], [r[1] for r in rows])
+
+suggest_cache = CatalogCache(build_suggest_index)
+
+@app.get("/suggest")
+def suggest(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50)):
+    """Title / author completions for a search box, most frequent first. Safe to call on every keystroke."""
+    index = suggest_cache.get()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Suggest index is not built. Run /sync first.")
+    return {"query": q, "suggestions": index.lookup(q, limit)}
+
+# -----------------------------
+# 3c. Facet Counts (Year / Decade / Class No / Publisher)
+# -----------------------------
+def build_facet_index() -> Optional[facets.FacetIndex]:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return facets.FacetIndex(conn)
+    except sqlite3.OperationalError:
+        return None  # No books table yet
+    finally:
+        conn.close()
+
+facet_cache = CatalogCache(build_facet_index)
+
+@app.get("/facets")
+def get_facets(
+    facet: Optional[List[str]] = Query(None, description="year, decade, class_no, place_publisher (default: all)"),
+    q: Optional[str] = Query(None, min_length=3, description="Keyword: Title/Author contains"),
+    semantic: Optional[str] = Query(None, min_length=3, description="Semantic query, counts its top_k matches"),
+    top_k: int = Query(FACET_SEMANTIC_TOP_K, ge=1, le=5000),
+    limit: int = Query(20, ge=1, le=1000, description="Values per facet"),
+    sort: str = Query("count", pattern="^(count|value)$"),
+    db: sqlite3.Connection = Depends(get_db),
+):
+    """
+    Book counts per facet value. Without q/semantic the counts come straight from
+    the facet_counts table built by /sync. With q and/or semantic, each result set
+    becomes a bitmap over the catalog, the bitmaps are ANDed, and every facet is
+    counted over the surviving rows in memory.
+    """
+    index = facet_cache.get()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Facet index is not built. Run /sync first.")
+    names = facet or index.names
+    unknown = [n for n in names if n not in index.names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown facet(s): {', '.join(unknown)}. Available: {', '.join(index.names)}")
+
+    mask = None
+    if q:
+        term = f"%{q}%"
+        ids = [row[0] for row in db.execute(
+            "SELECT rowid FROM books WHERE title LIKE ? OR author_editor LIKE ?", (term, term))]
+        mask = index.mask_for_ids(ids)
+    if semantic:
+        store = live_store.get()
+        if ai_model is None or store is None:
+            raise HTTPException(status_code=503, detail="AI System is not loaded.")
+        # The vector ids are only books rowids if /reindex built them from this very table
+        if store.meta.get("catalog_version") != catalog_export.catalog_version(db):
+            raise HTTPException(status_code=409, detail="Vectors were not built from the current books table. "
+                                                        "Run /reindex first.")
+        scores = np.dot(store.embeddings, ai_model.encode([semantic]).T).flatten()
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        semantic_mask = index.mask_for_ids(store.ids[top])
+        mask = semantic_mask if mask is None else mask & semantic_mask
+
+    total = len(index) if mask is None else int(mask.sum())
+    return {
+        "total": total,
+        "facets": {name: index.counts(name, mask, limit, sort) for name in names},
+    }
 
 # -----------------------------
 # 4. AI Recommendation (Semantic Search)
@@ -112,26 +456,27 @@ def recommend_books(user_query: str):
     Input: "I want a sad story about space travel"
     Output: Top 5 books that match the MEANING (vectors).
     """
-    if ai_model is None or book_vectors is None:
+    # Take one reference for the whole request, so a hot-swap can't mix two versions
+    store = live_store.get()
+    if ai_model is None or store is None:
         raise HTTPException(status_code=503, detail="AI System is not loaded.")
 
     # 1. Convert User Query to Vector
     query_vector = ai_model.encode([user_query])
     
     # 2. Calculate Similarity (Dot Product)
-    scores = np.dot(book_vectors, query_vector.T).flatten()
+    scores = np.dot(store.embeddings, query_vector.T).flatten()
     
     # 3. Get Top 5 Indices
     top_indices = np.argsort(scores)[-5:][::-1]
     
-    # 4. Retrieve Book Details from DataFrame (Fast RAM lookup)
+    # 4. Retrieve Book Details from the shared columns (memory-mapped lookup)
     results = []
     for idx in top_indices:
-        book = book_df.iloc[idx]
         results.append({
-            "title": str(book['Title']),
-            "author": str(book['Author_Editor']),
-            "description": str(book['description'])[:200] + "...", # Truncate for clean display
+            "title": store.columns["title"][idx],
+            "author": store.columns["author"][idx],
+            "description": store.columns["description"][idx][:200] + "...", # Truncate for clean display
             "score": float(f"{scores[idx]:.4f}")
         })
         
@@ -141,52 +486,171 @@ def recommend_books(user_query: str):
 # 5. Get Book by ISBN
 # -----------------------------
 @app.get("/books/{isbn}")
-def get_book_by_isbn(isbn: str, db: sqlite3.Connection = Depends(get_db)):
+def get_book_by_isbn(isbn: str, fields: Optional[str] = FIELDS_QUERY, db: sqlite3.Connection = Depends(get_db)):
     clean_isbn = isbn.strip().replace("-", "")
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM books WHERE REPLACE(isbn, '-', '') = ?", (clean_isbn,))
-    row = cursor.fetchone()
-    if row is None:
-        raise HTTPException(status_code=404, detail="Book not found")
-    return dict(row)
+    columns = resolve_fields(fields, db)
+    select = ", ".join(quote_column(c) for c in columns)
+
+    def fallback():
+        return dict(db.execute(f"SELECT {select} FROM books WHERE REPLACE(isbn, '-', '') = ? LIMIT 1",
+                               (clean_isbn,)).fetchone())
+
+    return json_response(db, f"""
+        SELECT {json_row_sql(columns)}, {real_flag_sql(columns)} FROM books WHERE REPLACE(isbn, '-', '') = ? LIMIT 1
+    """, (clean_isbn,), fallback)
 
 # -----------------------------
-# 6. Sync Data (Reset DB)
+# 6. Background Jobs: Sync Data + Rebuild Embeddings
 # -----------------------------
-@app.post("/sync")
-def sync_database():
-    if not os.path.exists(CSV_SOURCE):
-        raise HTTPException(status_code=500, detail="Source CSV not found")
+def run_sync(job: jobs.Job) -> Dict[str, Any]:
+    """
+    Load the CSV into fresh `<table>_new_<job id>` tables and swap them in, all inside
+    one BEGIN IMMEDIATE transaction. The write lock is held across processes for the
+    whole load + swap, so a second sync (from any worker) waits for it instead of
+    interleaving. The DB is in WAL mode, so readers are never blocked and keep seeing
+    the old tables until the commit.
+    """
+    job.report(0.0, "Reading CSV")
+    # Read as text so values like class_no '001' keep their leading zeros
+    df = pd.read_csv(CSV_SOURCE, encoding="latin-1", on_bad_lines='skip', dtype=str)
+    df.columns = [c.strip().lower() for c in df.columns]
+    df = df[[c for c in SYNC_COLUMNS if c in df.columns]]
+    if "year" in df.columns:
+        df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+    # Plain Python values (None for NaN / <NA>) for executemany
+    rows = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+    staging = {table: f"{table}_new_{job.id}" for table in SYNC_TABLES}
+
+    conn = sqlite3.connect(DB_PATH, timeout=SYNC_LOCK_POLL)
     try:
-        df = pd.read_csv(CSV_SOURCE, encoding="latin-1", on_bad_lines='skip')
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("DROP TABLE IF EXISTS books")
-        cursor.execute("""
-        CREATE TABLE books (
+        while True:
+            try:
+                # WAL (persistent, so a no-op after the first sync): readers keep reading the
+                # old tables during the load instead of being locked out once it spills to disk
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                job.report(0.0, "Waiting for another sync to finish")
+        conn.execute("PRAGMA busy_timeout = 30000")  # The swap's commit may wait for readers
+
+        conn.execute(f"""
+        CREATE TABLE {staging["books"]} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            acc_no TEXT,
-            title TEXT,
-            isbn TEXT,
-            author_editor TEXT,
-            publisher TEXT,
-            year INTEGER,
-            pages INTEGER,
-            class_no TEXT,
-            description TEXT
+            {", ".join(f"{name} {kind}" for name, kind in SYNC_COLUMNS.items())}
         )
         """)
-        df.columns = [c.strip().lower() for c in df.columns]
-        df.to_sql("books", conn, if_exists="append", index=False)
+        insert = (f"INSERT INTO {staging['books']} ({', '.join(df.columns)}) "
+                  f"VALUES ({', '.join('?' * len(df.columns))})")
+        for start in range(0, len(rows), SYNC_CHUNK_ROWS):
+            job.report(0.05 + 0.9 * start / max(len(rows), 1), f"Inserted {start} of {len(rows)} rows")
+            conn.executemany(insert, rows[start:start + SYNC_CHUNK_ROWS])
+
+        job.report(0.93, "Counting facets")
+        facets.materialize(conn, source=staging["books"], target=staging["facet_counts"])
+
+        job.report(0.95, "Swapping tables")
+        for table in SYNC_TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"ALTER TABLE {staging[table]} RENAME TO {table}")
         conn.commit()
+    except BaseException:
+        # Nothing was committed, so the staging tables go away with the rollback
+        conn.rollback()
+        raise
+    finally:
         conn.close()
-        return {"status": "success", "message": f"Synced {len(df)} books."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    # The new tables are live from here on, so no more cancellation checkpoints
+    job.note("Rebuilding suggest + facet indexes")
+    suggest_cache.refresh()
+    facet_cache.refresh()
+    return {"status": "success", "message": f"Synced {len(rows)} books."}
+
+def run_reindex(job: jobs.Job) -> Dict[str, Any]:
+    """Re-embed every row of the books table and publish it as a new vector_store version."""
+    if ai_model is None:
+        raise RuntimeError("AI model is not loaded")
+    job.report(0.0, "Reading books table")
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        # Read before the rows: a /sync landing in between then shows up as a mismatch, never the reverse
+        catalog_version = catalog_export.catalog_version(conn)
+        rows = conn.execute("SELECT rowid, title, author_editor, description FROM books ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+    # Same cleaning as generate_embeddings.py
+    ids = [row[0] for row in rows]
+    titles = [str(row[1]) if row[1] is not None else "Unknown Title" for row in rows]
+    authors = [str(row[2]) if row[2] is not None else "Unknown Author" for row in rows]
+    descriptions = [str(row[3]) if row[3] is not None else "Description not available" for row in rows]
+    texts = [f"{t} {a} {d}" for t, a, d in zip(titles, authors, descriptions)]
+
+    parts = []
+    for start in range(0, len(texts), REINDEX_BATCH):
+        job.report(0.95 * start / max(len(texts), 1), f"Embedded {start} of {len(texts)} books")
+        parts.append(ai_model.encode(texts[start:start + REINDEX_BATCH]))
+    if not parts:
+        raise RuntimeError("books table is empty")
+
+    job.report(0.95, "Publishing vectors")
+    version = vector_store.publish(
+        np.vstack(parts),
+        {"title": titles, "author": authors, "description": descriptions},
+        ids=ids,
+        catalog_version=catalog_version,
+    )
+    live_store.last_check = 0.0  # Swap this worker right away; the others follow within a second
+    return {"status": "success", "message": f"Indexed {len(texts)} books.", "version": version}
+
+def get_job_runner() -> jobs.JobRunner:
+    if job_runner is None:
+        raise HTTPException(status_code=503, detail="Job runner is not running.")
+    return job_runner
+
+@app.post("/sync", status_code=202)
+def sync_database(reindex: bool = False):
+    """Reload the DB from CSV in the background. With reindex=true the embeddings are rebuilt right after."""
+    if not os.path.exists(CSV_SOURCE):
+        raise HTTPException(status_code=500, detail="Source CSV not found")
+    runner = get_job_runner()
+    job = runner.submit("sync", run_sync)
+    if reindex:
+        job["reindex_job"] = runner.submit("reindex", run_reindex)
+    return job
+
+@app.post("/reindex", status_code=202)
+def reindex_books():
+    """Rebuild the embeddings from the books table and hot-swap them into /recommend."""
+    if ai_model is None:
+        raise HTTPException(status_code=503, detail="AI System is not loaded.")
+    return get_job_runner().submit("reindex", run_reindex)
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": get_job_runner().list()}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = get_job_runner().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    # --reload and --workers can't be combined, so only auto-reload in single-worker mode
+    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=WORKERS == 1, workers=WORKERS)
 
 # from fastapi import FastAPI, HTTPException, Query, Depends
 # import sqlite3
@@ -0,0 +1,105 @@
+import re
+import unicodedata
+import numpy as np
+from vector_store import pack_strings, StringColumn
+
+# --- CONFIGURATION ---
+MAX_KEY_BYTES = 48     # Keys are truncated; longer prefixes still match, just less strictly
+CACHED_PREFIX = 2      # Top results are precomputed for every prefix up to this many bytes
+CACHE_DEPTH = 10       # ... this many of them
+KINDS = ("title", "author")
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """'Gödel, Escher — Bach' -> 'godel escher bach' (accents, case and punctuation removed)."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+class SuggestIndex:
+    """
+    Prefix index over normalized titles and authors.
+    One entry per distinct normalized string, ranked by how many catalog rows
+    carry it (copies of a title / books by an author). Everything lives in flat
+    numpy arrays sorted by key, and a lookup is two binary searches (searchsorted)
+    plus a top-k over the matching slice.
+    """
+
+    def __init__(self, titles, authors):
+        counts = {}
+        for kind, values in enumerate((titles, authors)):
+            for raw in values:
+                if raw is None:
+                    continue
+                key = normalize(raw)
+                if not key:
+                    continue
+                entry = counts.get((kind, key))
+                if entry is None:
+                    counts[(kind, key)] = [1, str(raw).strip()]
+                else:
+                    entry[0] += 1
+
+        keys = np.array([key.encode("utf-8")[:MAX_KEY_BYTES] for _, key in counts], dtype=f"S{MAX_KEY_BYTES}")
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.counts = np.array([e[0] for e in counts.values()], dtype=np.int32)[order]
+        self.kinds = np.array([kind for kind, _ in counts], dtype=np.int8)[order]
+        displays = [e[1] for e in counts.values()]
+        self.text = StringColumn(*pack_strings([displays[i] for i in order]))
+
+        self.cache = {}
+        for n in range(1, CACHED_PREFIX + 1):
+            for prefix in np.unique(self.keys.astype(f"S{n}")):
+                self.cache[bytes(prefix)] = self._top(*self._range(bytes(prefix)), CACHE_DEPTH)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def nbytes(self):
+        return (self.keys.nbytes + self.counts.nbytes + self.kinds.nbytes
+                + self.text.blob.nbytes + self.text.offsets.nbytes)
+
+    def _range(self, prefix):
+        lo = np.searchsorted(self.keys, prefix, side="left")
+        # 0xff never occurs in UTF-8, so prefix + 0xff sorts after every key starting with prefix
+        hi = np.searchsorted(self.keys, prefix + b"\xff", side="left")
+        return int(lo), int(hi)
+
+    def _top(self, lo, hi, limit):
+        """Positions of the `limit` highest counts in keys[lo:hi], ties in alphabetical order."""
+        segment = self.counts[lo:hi]
+        if len(segment) > limit:
+            # Everything above the limit-th highest count, then the first (= alphabetical,
+            # keys are sorted) entries tied with it; argpartition would pick arbitrary ties
+            cutoff = -np.partition(-segment, limit - 1)[limit - 1]
+            above = np.flatnonzero(segment > cutoff)
+            need = limit - len(above)
+            # Most entries tie at the cutoff (count 1), so only scan as far as needed
+            stop = max(need * 16, 256)
+            while True:
+                tied = np.flatnonzero(segment[:stop] == cutoff)
+                if len(tied) >= need or stop >= len(segment):
+                    break
+                stop *= 16
+            candidates = np.concatenate((above, tied[:need]))
+        else:
+            candidates = np.arange(len(segment))
+        ranked = candidates[np.lexsort((candidates, -segment[candidates]))]
+        return (ranked + lo).tolist()
+
+    def lookup(self, query, limit=CACHE_DEPTH):
+        prefix = normalize(query).encode("utf-8")[:MAX_KEY_BYTES - 1]
+        if not prefix:
+            return []
+        if prefix in self.cache and limit <= CACHE_DEPTH:
+            positions = self.cache[prefix][:limit]
+        else:
+            positions = self._top(*self._range(prefix), limit)
+        return [
+            {"text": self.text[i], "kind": KINDS[self.kinds[i]], "count": int(self.counts[i])}
+            for i in positions
+        ]
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import pickle
+import shutil
+import numpy as np
+
+# --- CONFIGURATION ---
+STORE_ROOT = "vector_store"
+POINTER_FILE = "CURRENT"
+KEEP_VERSIONS = 3        # Old versions are kept around so in-flight requests can finish
+CHECK_INTERVAL = 1.0     # Seconds between checks for a newly published version
+LOCK_STALE_AFTER = 120   # Seconds after which a .publish.lock is considered abandoned
+
+# Pickle column -> store column
+PICKLE_COLUMNS = {
+    "Title": "title",
+    "Author_Editor": "author",
+    "description": "description",
+}
+
+
+# -----------------------------
+# Strings packed into one UTF-8 blob + offsets
+# -----------------------------
+def pack_strings(values):
+    """Turn a list of strings into (uint8 blob, int64 offsets) arrays."""
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+class StringColumn:
+    """Read-only list of strings backed by a blob + offsets (works on memory-mapped arrays)."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+
+# -----------------------------
+# Reading a published version
+# -----------------------------
+class VectorStore:
+    """
+    One published version of the embedding matrix + metadata columns.
+    Every array is opened with mmap_mode="r", so all worker processes share
+    the same pages from the OS file cache instead of holding private copies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.version = os.path.basename(path)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.columns = {}
+        for name in self.meta["columns"]:
+            blob = np.load(os.path.join(path, f"{name}.blob.npy"), mmap_mode="r")
+            offsets = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode="r")
+            self.columns[name] = StringColumn(blob, offsets)
+
+    def __len__(self):
+        return self.embeddings.shape[0]
+
+
+def current_version(root=STORE_ROOT):
+    try:
+        with open(os.path.join(root, POINTER_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def open_current(root=STORE_ROOT):
+    version = current_version(root)
+    if version is None:
+        return None
+    return VectorStore(os.path.join(root, version))
+
+
+# -----------------------------
+# Publishing a new version
+# -----------------------------
+def publish(embeddings, columns, ids=None, root=STORE_ROOT, catalog_version=None):
+    """
+    Write a new version next to the current one, then flip the CURRENT pointer
+    with os.replace (atomic), so readers see either the old or the new version.
+    `ids` are the SQLite book ids of each row (defaults to 1..n, the order /sync inserts them).
+    `catalog_version` is the books table version the ids were read from; leave it None
+    when they weren't (e.g. converted from the pickle), so nothing relies on them as rowids.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if ids is None:
+        ids = np.arange(1, embeddings.shape[0] + 1, dtype=np.int64)
+    ids = np.asarray(ids, dtype=np.int64)
+
+    version = f"v{int(time.time() * 1000)}"
+    os.makedirs(root, exist_ok=True)
+    tmp_path = os.path.join(root, f".tmp-{version}-{os.getpid()}")
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, "embeddings.npy"), embeddings)
+    np.save(os.path.join(tmp_path, "ids.npy"), ids)
+    for name, values in columns.items():
+        blob, offsets = pack_strings(values)
+        np.save(os.path.join(tmp_path, f"{name}.blob.npy"), blob)
+        np.save(os.path.join(tmp_path, f"{name}.offsets.npy"), offsets)
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"rows": int(embeddings.shape[0]), "dim": int(embeddings.shape[1]),
+                   "columns": list(columns), "catalog_version": catalog_version}, f)
+
+    os.replace(tmp_path, os.path.join(root, version))
+
+    pointer_tmp = os.path.join(root, f"{POINTER_FILE}.{os.getpid()}.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(root, POINTER_FILE))
+
+    _prune(root, keep=KEEP_VERSIONS)
+    return version
+
+
+def _prune(root, keep):
+    versions = sorted(d for d in os.listdir(root) if d.startswith("v"))
+    for old in versions[:-keep]:
+        # On Windows a version still mapped by a worker can't be deleted yet; try again next publish
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+
+def publish_from_pickle(pkl_path, root=STORE_ROOT):
+    """Convert the books_vectors.pkl written by generate_embeddings.py into a store version."""
+    with open(pkl_path, "rb") as f:
+        data = pickle.load(f)
+    df = data["dataframe"]
+    columns = {dst: df[src].tolist() for src, dst in PICKLE_COLUMNS.items()}
+    return publish(data["embeddings"], columns, root=root)
+
+
+def pid_alive(pid):
+    """False only when the process is known to be gone. Also used by jobs.py."""
+    # os.kill(pid, 0) only probes on POSIX; on Windows it would terminate the process
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _lock_is_stale(lock_path, stale_after):
+    """A lock is stale when its owner is gone (POSIX) or it hasn't been touched for stale_after seconds."""
+    try:
+        with open(lock_path, encoding="utf-8") as f:
+            pid = int(f.read().strip() or 0)
+        age = time.time() - os.path.getmtime(lock_path)
+    except (FileNotFoundError, ValueError):
+        return True
+    return age > stale_after or (pid != 0 and not pid_alive(pid))
+
+
+def ensure_published(pkl_path, root=STORE_ROOT, stale_after=LOCK_STALE_AFTER):
+    """
+    Make sure a version exists. When several workers start at once only one of them
+    (the one that wins the lock file) converts the pickle; the rest wait for the pointer.
+    A lock left behind by a killed worker is taken over instead of waited on. The lock
+    only saves duplicate work: publish() swaps the pointer atomically, so two workers
+    publishing at once (e.g. both taking over the same stale lock) is still safe.
+    """
+    os.makedirs(root, exist_ok=True)
+    lock_path = os.path.join(root, ".publish.lock")
+    while current_version(root) is None and os.path.exists(pkl_path):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if _lock_is_stale(lock_path, stale_after):
+                print(f"⚠️ Removing stale {lock_path} left by a stopped worker.")
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+            else:
+                time.sleep(0.2)
+            continue
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            if current_version(root) is None:
+                publish_from_pickle(pkl_path, root)
+        finally:
+            os.close(fd)
+            os.remove(lock_path)
+
+
+# -----------------------------
+# Hot-swapping handle used by the API workers
+# -----------------------------
+class LiveStore:
+    """
+    Holds the currently opened version and re-checks the pointer at most once per
+    CHECK_INTERVAL. Callers grab `get()` once per request, so a swap never changes
+    the arrays under a request that is already running.
+    """
+
+    def __init__(self, root=STORE_ROOT):
+        self.root = root
+        self.store = None
+        self.last_check = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        if now - self.last_check >= CHECK_INTERVAL:
+            self.last_check = now
+            version = current_version(self.root)
+            if version is not None and (self.store is None or self.store.version != version):
+                self.store = VectorStore(os.path.join(self.root, version))
+        return self.store
+
+
+if __name__ == "__main__":
+    import sys
+
+    pkl = sys.argv[1] if len(sys.argv) > 1 else "books_vectors.pkl"
+    print(f"📦 Publishing {pkl} to {STORE_ROOT}/ ...")
+    print(f"✅ Published version {publish_from_pickle(pkl)}. Running workers will pick it up.")